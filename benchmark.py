@@ -0,0 +1,386 @@
+""" Benchmarks for DynamoDBMetaStore
+
+Runs against an in-process DynamoDB stand-in (moto) or the in-memory
+backend, so no network or DynamoDB Local is required. Latency and
+throttling can be injected into every storage call to approximate a
+real deployment.
+
+Results are written as JSON so that runs can be compared between releases:
+
+    python benchmark.py --output before.json
+    python benchmark.py --latency-ms 5 --throttle-rate 0.01
+    python benchmark.py --backend memory
+"""
+from dynamodb_meta_store import DynamoDBMetaStore
+from dynamodb_meta_store.backends import Backend, InMemoryBackend
+from dynamodb_meta_store.meta_store import replace_decimals
+
+import argparse
+import copy
+import decimal
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import boto3
+import botocore
+import contextlib
+
+try:
+    from moto import mock_aws
+except ImportError:  # moto < 5
+    from moto import mock_dynamodb as mock_aws
+
+
+# moto accepts any credentials, but boto3 refuses to sign without them
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "testing")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "testing")
+os.environ.setdefault("AWS_DEFAULT_REGION", "us-east-1")
+
+
+class FaultInjector(object):
+    """ Add latency and throttling to storage calls """
+
+    def __init__(self, latency_ms=0, throttle_rate=0, seed=0):
+        """ Constructor for the fault injector
+        :type latency_ms: float
+        :param latency_ms: Latency added to every call, in milliseconds
+        :type throttle_rate: float
+        :param throttle_rate: Probability (0-1) for a call to be throttled
+        :type seed: int
+        :param seed: Seed for the throttling random generator
+        :returns: None
+        """
+        self.latency = latency_ms / 1000.0
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.throttled = 0
+
+    def attach(self, client):
+        """ Inject faults into every DynamoDB call of a client
+        :type client: botocore.client.DynamoDB
+        :param client: Client to inject faults into
+        :returns: None
+        """
+        client.meta.events.register("before-call.dynamodb.*", self._before_call)
+
+    def _before_call(self, model, **kwargs):
+        self.inject(model.name)
+
+    def inject(self, operation):
+        """ Sleep and possibly throttle a call
+        :type operation: str
+        :param operation: Name of the called operation
+        :returns: None
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        if self.throttle_rate and self.random.random() < self.throttle_rate:
+            self.throttled += 1
+            raise botocore.exceptions.ClientError(
+                {
+                    "Error": {
+                        "Code": "ProvisionedThroughputExceededException",
+                        "Message": "Injected throttling"
+                    }
+                },
+                operation
+            )
+
+
+class FaultyBackend(Backend):
+    """ Backend wrapper injecting faults before every call """
+
+    def __init__(self, backend, injector):
+        self.backend = backend
+        self.injector = injector
+
+    def validate_schema(self, hash_key, range_key):
+        return self.backend.validate_schema(hash_key, range_key)
+
+    def get(self, key, consistent_read=False):
+        self.injector.inject("GetItem")
+        return self.backend.get(key, consistent_read=consistent_read)
+
+    def put(self, item):
+        self.injector.inject("PutItem")
+        return self.backend.put(item)
+
+    def replace(self, item):
+        self.injector.inject("PutItem")
+        return self.backend.replace(item)
+
+    def batch_write(self, items=None, keys=None):
+        self.injector.inject("BatchWriteItem")
+        return self.backend.batch_write(items=items, keys=keys)
+
+    def query(
+        self, hash_key, hash_value, consistent_read=False, start_key=None,
+        range_key=None, range_prefix=None
+    ):
+        self.injector.inject("Query")
+        return self.backend.query(
+            hash_key, hash_value, consistent_read=consistent_read, start_key=start_key,
+            range_key=range_key, range_prefix=range_prefix
+        )
+
+    def batch_get(self, keys, consistent_read=False):
+        self.injector.inject("BatchGetItem")
+        return self.backend.batch_get(keys, consistent_read=consistent_read)
+
+
+def make_item(size):
+    """ Build an option document of roughly the given size
+    The document mixes strings, integers, decimals and lists so that
+    replace_decimals has representative work to do.
+    :type size: int
+    :param size: Approximate size of the document in bytes
+    :returns: dict -- Option document
+    """
+    item = {}
+    current = 0
+    i = 0
+    while current < size:
+        kind = i % 4
+        if kind == 0:
+            value = "v" * 24
+        elif kind == 1:
+            value = i * 1000
+        elif kind == 2:
+            value = decimal.Decimal(i) / 4
+        else:
+            value = [j for j in range(4)]
+        name = "field%d" % i
+        item[name] = value
+        current += len(name) + len(str(value))
+        i += 1
+    return item
+
+
+def make_schema(item):
+    """ Build the schema of an option document made by make_item
+    :type item: dict
+    :param item: Option document
+    :returns: dict -- Field name to type mapping
+    """
+    types = {str: str, int: int, decimal.Decimal: float, list: list}
+    return {name: types[type(value)] for name, value in item.items()}
+
+
+def scale_iterations(iterations, size, args):
+    """ Scale the number of iterations down for large operations
+    Operations touching more than --scale-bytes run proportionally fewer
+    iterations, but at least --min-iterations, so that large items and
+    stores finish in bounded time.
+    :type iterations: int
+    :param iterations: Number of iterations for small operations
+    :type size: int
+    :param size: Approximate number of bytes touched by one operation
+    :type args: argparse.Namespace
+    :param args: Command line arguments
+    :returns: int -- Number of iterations
+    """
+    if size <= args.scale_bytes:
+        return iterations
+    return max(args.min_iterations, iterations * args.scale_bytes // size)
+
+
+def measure(func, iterations, injector):
+    """ Time a function call
+    :type func: callable
+    :param func: Function to benchmark
+    :type iterations: int
+    :param iterations: Number of times to call the function
+    :type injector: FaultInjector
+    :param injector: Fault injector used to count throttled calls
+    :returns: dict -- Timing statistics in microseconds
+    """
+    timings = []
+    errors = 0
+    throttled = injector.throttled
+    for _ in range(iterations):
+        start = time.perf_counter()
+        try:
+            func()
+        except botocore.exceptions.ClientError:
+            errors += 1
+            continue
+        timings.append((time.perf_counter() - start) * 1e6)
+
+    result = {
+        "iterations": iterations,
+        "errors": errors,
+        "throttled": injector.throttled - throttled,
+    }
+    if timings:
+        timings.sort()
+        result.update({
+            "mean_us": round(statistics.mean(timings), 3),
+            "min_us": round(timings[0], 3),
+            "p50_us": round(timings[len(timings) // 2], 3),
+            "p95_us": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+            "max_us": round(timings[-1], 3),
+        })
+    return result
+
+
+def run_case(store_size, item_size, args):
+    """ Run all benchmarks for a store and item size
+    :type store_size: int
+    :param store_size: Number of options in the store
+    :type item_size: int
+    :param item_size: Approximate size of each option in bytes
+    :type args: argparse.Namespace
+    :param args: Command line arguments
+    :returns: list -- One result per benchmarked operation
+    """
+    injector = FaultInjector(
+        latency_ms=args.latency_ms, throttle_rate=args.throttle_rate, seed=args.seed
+    )
+    with contextlib.ExitStack() as stack:
+        if args.backend == "memory":
+            backend = InMemoryBackend()
+            store = DynamoDBMetaStore(
+                table_name="benchmark",
+                store_name="benchmark",
+                backend=FaultyBackend(backend, injector)
+            )
+        else:
+            stack.enter_context(mock_aws())
+            session = boto3.session.Session(region_name="us-east-1")
+            store = DynamoDBMetaStore(
+                table_name="benchmark",
+                store_name="benchmark",
+                connection=session.resource("dynamodb"),
+                session=session,
+                create_table=True
+            )
+            backend = store.backend
+        item = make_item(item_size)
+        loader = DynamoDBMetaStore(table_name="benchmark", store_name="benchmark", backend=backend)
+        for i in range(store_size):
+            loader.set("option%d" % i, dict(item))
+
+        # The typed option lives in its own partition, so that it does not
+        # change the size of the store read by the query benchmark
+        schema = make_schema(item)
+        typed_store = DynamoDBMetaStore(
+            table_name="benchmark",
+            store_name="benchmark-typed",
+            backend=store.backend,
+            schemas={"typed": schema}
+        )
+        typed_loader = DynamoDBMetaStore(
+            table_name="benchmark",
+            store_name="benchmark-typed",
+            backend=backend,
+            schemas={"typed": schema}
+        )
+        typed = typed_store.schemas["typed"].coerce(replace_decimals(copy.deepcopy(item)))
+        typed_loader.set("typed", replace_decimals(copy.deepcopy(item)))
+
+        # Inject faults only once the stores are populated
+        if args.backend != "memory":
+            injector.attach(store.connection.meta.client)
+            injector.attach(store.backend.client)
+        raw = store.get_option("option0")
+
+        iterations = scale_iterations(args.iterations, item_size, args)
+        query_iterations = scale_iterations(args.query_iterations, item_size * store_size, args)
+        benchmarks = [
+            ("set", lambda: store.set("option0", dict(item)), iterations),
+            ("get", lambda: store.get("option0"), iterations),
+            ("get_option", lambda: store.get_option("option0"), iterations),
+            ("query", lambda: store.get(), query_iterations),
+            ("set_typed", lambda: typed_store.set("typed", typed), iterations),
+            ("get_typed", lambda: typed_store.get("typed"), iterations),
+        ]
+        results = []
+        for name, func, count in benchmarks:
+            result = {"operation": name, "store_size": store_size, "item_size": item_size}
+            result.update(measure(func, count, injector))
+            results.append(result)
+
+        # replace_decimals mutates its argument, copy outside of the timing
+        copies = [copy.deepcopy(raw) for _ in range(iterations)]
+        result = {"operation": "replace_decimals", "store_size": store_size, "item_size": item_size}
+        result.update(measure(lambda: replace_decimals(copies.pop()), iterations, injector))
+        results.append(result)
+
+        # moto drops the table when the mock stops, deleting it could be throttled
+        return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark DynamoDBMetaStore without network")
+    parser.add_argument("--backend", choices=["moto", "memory"], default="moto",
+                        help="Storage to run against")
+    parser.add_argument("--item-sizes", type=int, nargs="+", default=[256, 4096, 512 * 1024],
+                        help="Approximate option sizes in bytes")
+    parser.add_argument("--store-sizes", type=int, nargs="+", default=[1, 10, 100],
+                        help="Number of options in the store")
+    parser.add_argument("--iterations", type=int, default=100,
+                        help="Iterations for single option operations")
+    parser.add_argument("--query-iterations", type=int, default=20,
+                        help="Iterations for full store queries")
+    parser.add_argument("--scale-bytes", type=int, default=1024,
+                        help="Operations touching more bytes run proportionally fewer iterations")
+    parser.add_argument("--min-iterations", type=int, default=3,
+                        help="Minimum number of iterations of scaled down operations")
+    parser.add_argument("--max-store-bytes", type=int, default=1024 * 1024,
+                        help="Skip store and item size combinations larger than this")
+    parser.add_argument("--latency-ms", type=float, default=0,
+                        help="Latency injected into every DynamoDB call")
+    parser.add_argument("--throttle-rate", type=float, default=0,
+                        help="Probability (0-1) for a DynamoDB call to be throttled")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for the throttling random generator")
+    parser.add_argument("--output", help="Write results to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    results = []
+    skipped = []
+    for store_size in args.store_sizes:
+        for item_size in args.item_sizes:
+            if store_size * item_size > args.max_store_bytes:
+                skipped.append({"store_size": store_size, "item_size": item_size})
+                continue
+            results.extend(run_case(store_size, item_size, args))
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "boto3": boto3.__version__,
+            "botocore": botocore.__version__,
+        },
+        "parameters": {
+            "backend": args.backend,
+            "item_sizes": args.item_sizes,
+            "store_sizes": args.store_sizes,
+            "iterations": args.iterations,
+            "query_iterations": args.query_iterations,
+            "scale_bytes": args.scale_bytes,
+            "min_iterations": args.min_iterations,
+            "max_store_bytes": args.max_store_bytes,
+            "latency_ms": args.latency_ms,
+            "throttle_rate": args.throttle_rate,
+            "seed": args.seed,
+        },
+        "results": results,
+        "skipped": skipped,
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        json.dump(report, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
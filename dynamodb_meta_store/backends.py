@@ -0,0 +1,365 @@
+from boto3.dynamodb.conditions import Key
+from dynamodb_meta_store.exceptions import UnprocessedKeysException
+import bisect
+import copy
+import decimal
+import threading
+import time
+
+
+class Backend(object):
+    """ Storage backend interface used by DynamoDBMetaStore
+
+    Items are plain dictionaries holding both key attributes and the
+    option data. Keys are dictionaries with the hash and range key only.
+
+    Backends with supports_wire set also read and write items in the
+    DynamoDB wire format ({"port": {"N": "80"}}), skipping the generic
+    boto3 (de)serialization for options with a schema.
+    """
+
+    supports_wire = False
+
+    def validate_schema(self, hash_key, range_key):
+        """ Check that the backend uses the given key names
+        :type hash_key: str
+        :param hash_key: Name of the hash key attribute
+        :type range_key: str
+        :param range_key: Name of the range key attribute
+        :returns: bool -- True if the key names match
+        """
+        return True
+
+    def get(self, key, consistent_read=False):
+        """ Get a single item
+        :type key: dict
+        :param key: Hash and range key of the item
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read
+        :returns: dict -- The item, None if it does not exist
+        """
+        raise NotImplementedError
+
+    def put(self, item):
+        """ Insert or replace an item
+        :type item: dict
+        :param item: Item including its hash and range key
+        :returns: bool -- True if the item was stored successfully
+        """
+        raise NotImplementedError
+
+    def replace(self, item):
+        """ Insert or replace an item and return the replaced item
+        :type item: dict
+        :param item: Item including its hash and range key
+        :returns: dict -- The replaced item, None if there was none
+        """
+        raise NotImplementedError
+
+    def get_wire(self, key, consistent_read=False):
+        """ Get a single item in the DynamoDB wire format
+        :type key: dict
+        :param key: Hash and range key of the item, in the wire format
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read
+        :returns: dict -- The item in the wire format, None if it does not exist
+        """
+        raise NotImplementedError
+
+    def put_wire(self, item):
+        """ Insert or replace an item in the DynamoDB wire format
+        :type item: dict
+        :param item: Item including its hash and range key, in the wire format
+        :returns: dict -- The replaced item in the wire format, None if there was none
+        """
+        raise NotImplementedError
+
+    def batch_write(self, items=None, keys=None):
+        """ Insert or replace, and delete several items at once
+        :type items: list
+        :param items: Items to insert or replace
+        :type keys: list
+        :param keys: Keys of the items to delete
+        :returns: None
+        """
+        raise NotImplementedError
+
+    def query(
+        self, hash_key, hash_value, consistent_read=False, start_key=None,
+        range_key=None, range_prefix=None
+    ):
+        """ Get all items of a partition, ordered by range key
+        :type hash_key: str
+        :param hash_key: Name of the hash key attribute
+        :type hash_value: str
+        :param hash_value: Value of the hash key
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read
+        :type start_key: dict
+        :param start_key: Return only items after this key
+        :type range_key: str
+        :param range_key: Name of the range key attribute, used with range_prefix
+        :type range_prefix: str
+        :param range_prefix: Return only items whose range key starts with this prefix
+        :returns: list -- List of items
+        """
+        raise NotImplementedError
+
+    def batch_get(self, keys, consistent_read=False):
+        """ Get several items at once
+        :type keys: list
+        :param keys: List of keys
+        :type consistent_read: bool
+        :param consistent_read: Use strongly consistent reads
+        :returns: list -- Items that exist, in no particular order
+        """
+        raise NotImplementedError
+
+
+class DynamoDBBackend(Backend):
+    """ Backend storing items in a DynamoDB table """
+
+    # Maximum number of keys in a single BatchGetItem request
+    batch_size = 100
+    # Number of times unprocessed keys are requested again, with
+    # exponential backoff starting at batch_backoff seconds
+    batch_retries = 8
+    batch_backoff = 0.05
+
+    def __init__(self, connection, table, client=None):
+        """ Constructor for the DynamoDB backend
+        :type connection: boto3.resources.factory.dynamodb.ServiceResource
+        :param connection: Connection to DynamoDB using boto3 library
+        :type table: boto3.resources.factory.dynamodb.Table
+        :param table: Table to store the items in
+        :type client: botocore.client.DynamoDB
+        :param client: Low-level client for wire format calls, with the same
+            credentials as the connection. The client of the connection cannot
+            be used, boto3 resources register their (de)serialization on it.
+            Wire format calls are not supported if None
+        :returns: None
+        """
+        self.connection = connection
+        self.table = table
+        self.client = client
+        self.supports_wire = client is not None
+
+    def get(self, key, consistent_read=False):
+        response = self.table.get_item(Key=key, ConsistentRead=consistent_read)
+        return response.get("Item")
+
+    def put(self, item):
+        response = self.table.put_item(Item=item)
+        return response["ResponseMetadata"]["HTTPStatusCode"] == 200
+
+    def replace(self, item):
+        response = self.table.put_item(Item=item, ReturnValues="ALL_OLD")
+        return response.get("Attributes")
+
+    def get_wire(self, key, consistent_read=False):
+        response = self.client.get_item(
+            TableName=self.table.name, Key=key, ConsistentRead=consistent_read
+        )
+        return response.get("Item")
+
+    def put_wire(self, item):
+        response = self.client.put_item(
+            TableName=self.table.name, Item=item, ReturnValues="ALL_OLD"
+        )
+        return response.get("Attributes")
+
+    def batch_write(self, items=None, keys=None):
+        with self.table.batch_writer() as batch:
+            for item in items or []:
+                batch.put_item(Item=item)
+            for key in keys or []:
+                batch.delete_item(Key=key)
+
+    def query(
+        self, hash_key, hash_value, consistent_read=False, start_key=None,
+        range_key=None, range_prefix=None
+    ):
+        items = []
+        condition = Key(hash_key).eq(hash_value)
+        if range_prefix is not None:
+            condition = condition & Key(range_key).begins_with(range_prefix)
+        kwargs = {
+            "KeyConditionExpression": condition,
+            "ConsistentRead": consistent_read,
+        }
+        if start_key:
+            kwargs["ExclusiveStartKey"] = start_key
+        while True:
+            response = self.table.query(**kwargs)
+            items.extend(response["Items"])
+            if not response.get("LastEvaluatedKey"):
+                return items
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def batch_get(self, keys, consistent_read=False):
+        items = []
+        name = self.table.name
+        for i in range(0, len(keys), self.batch_size):
+            request = {name: {"Keys": keys[i:i + self.batch_size], "ConsistentRead": consistent_read}}
+            attempt = 0
+            while True:
+                response = self.connection.batch_get_item(RequestItems=request)
+                items.extend(response["Responses"].get(name, []))
+                request = response.get("UnprocessedKeys")
+                if not request:
+                    break
+                if attempt >= self.batch_retries:
+                    raise UnprocessedKeysException(
+                        "%d keys still unprocessed after %d retries" % (len(request[name]["Keys"]), attempt)
+                    )
+                # Keys are left unprocessed when the table is throttled, back off
+                time.sleep(self.batch_backoff * 2 ** attempt)
+                attempt += 1
+        return items
+
+
+class InMemoryBackend(Backend):
+    """ Backend storing items in memory
+
+    Each partition is kept as a sorted list of range keys with a parallel
+    list of items, so queries return items in range key order like
+    DynamoDB does. Numbers are stored as decimal.Decimal, as returned
+    by DynamoDB, and floats are rejected like DynamoDB does. Reads are
+    always consistent.
+    """
+
+    def __init__(self, hash_key="_store", range_key="_option"):
+        """ Constructor for the in-memory backend
+        :type hash_key: str
+        :param hash_key: Name of the hash key attribute. Default _store
+        :type range_key: str
+        :param range_key: Name of the range key attribute. Default _option
+        :returns: None
+        """
+        self.hash_key = hash_key
+        self.range_key = range_key
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def validate_schema(self, hash_key, range_key):
+        return hash_key == self.hash_key and range_key == self.range_key
+
+    def _find(self, key):
+        """ Locate an item
+        :type key: dict
+        :param key: Hash and range key of the item
+        :returns: tuple -- (range keys, items, index, found)
+        """
+        keys, items = self._partitions.get(key[self.hash_key], ([], []))
+        index = bisect.bisect_left(keys, key[self.range_key])
+        found = index < len(keys) and keys[index] == key[self.range_key]
+        return keys, items, index, found
+
+    def get(self, key, consistent_read=False):
+        with self._lock:
+            _, items, index, found = self._find(key)
+            if found:
+                return copy.deepcopy(items[index])
+        return None
+
+    def put(self, item):
+        self.replace(item)
+        return True
+
+    def replace(self, item):
+        item = to_dynamodb(item)
+        with self._lock:
+            return self._replace(item)
+
+    def _replace(self, item):
+        """ Insert or replace an item, the lock must be held
+        :type item: dict
+        :param item: Item including its hash and range key
+        :returns: dict -- The replaced item, None if there was none
+        """
+        keys, items = self._partitions.setdefault(item[self.hash_key], ([], []))
+        _, _, index, found = self._find(item)
+        if found:
+            old, items[index] = items[index], item
+            return old
+        keys.insert(index, item[self.range_key])
+        items.insert(index, item)
+        return None
+
+    def batch_write(self, items=None, keys=None):
+        items = [to_dynamodb(item) for item in items or []]
+        with self._lock:
+            for item in items:
+                self._replace(item)
+            for key in keys or []:
+                partition, partition_items, index, found = self._find(key)
+                if found:
+                    del partition[index]
+                    del partition_items[index]
+
+    def query(
+        self, hash_key, hash_value, consistent_read=False, start_key=None,
+        range_key=None, range_prefix=None
+    ):
+        if hash_key != self.hash_key:
+            raise ValueError("Query key %s is not the hash key %s" % (hash_key, self.hash_key))
+        with self._lock:
+            keys, items = self._partitions.get(hash_value, ([], []))
+            start = 0
+            if start_key:
+                start = bisect.bisect_right(keys, start_key[self.range_key])
+            end = len(keys)
+            if range_prefix is not None:
+                start = max(start, bisect.bisect_left(keys, range_prefix))
+                end = start
+                while end < len(keys) and keys[end].startswith(range_prefix):
+                    end += 1
+            return copy.deepcopy(items[start:end])
+
+    def batch_get(self, keys, consistent_read=False):
+        found = []
+        for key in keys:
+            item = self.get(key)
+            if item is not None:
+                found.append(item)
+        return found
+
+
+def to_dynamodb(obj):
+    """ Copy an object, converting integers to decimal.Decimal
+    Floats are rejected like boto3 does when writing to DynamoDB.
+    :param obj: Object to convert
+    :returns: A converted copy of the object
+    """
+    if isinstance(obj, bool):
+        return obj
+    elif isinstance(obj, float):
+        raise TypeError("Float types are not supported. Use Decimal types instead.")
+    elif isinstance(obj, int):
+        return decimal.Decimal(obj)
+    elif isinstance(obj, list):
+        return [to_dynamodb(v) for v in obj]
+    elif isinstance(obj, dict):
+        return {k: to_dynamodb(v) for k, v in obj.items()}
+    elif isinstance(obj, set):
+        return {to_dynamodb(v) for v in obj}
+    else:
+        return copy.deepcopy(obj)
+
+
+def replace_decimals(obj):
+    if isinstance(obj, list):
+        for i in range(len(obj)):
+            obj[i] = replace_decimals(obj[i])
+        return obj
+    elif isinstance(obj, dict):
+        for k, v in obj.items():
+            obj[k] = replace_decimals(v)
+        return obj
+    elif isinstance(obj, decimal.Decimal):
+        if obj % 1 == 0:
+            return int(obj)
+        else:
+            return float(obj)
+    else:
+        return obj
@@ -11,3 +11,13 @@ class MisconfiguredSchemaException(Exception):
 class ItemNotFound(Exception):
     """ Exception thrown if the item does not exist in table """
     pass
+
+
+class InconsistentItemException(Exception):
+    """ Exception thrown if a chunked item keeps changing while being read """
+    pass
+
+
+class UnprocessedKeysException(Exception):
+    """ Exception thrown if a batch read keeps returning unprocessed keys """
+    pass
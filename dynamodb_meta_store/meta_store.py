@@ -1,21 +1,44 @@
-from boto3.dynamodb.conditions import Key
+from dynamodb_meta_store.backends import DynamoDBBackend, replace_decimals, to_dynamodb
 from dynamodb_meta_store.exceptions import TableNotReadyException, \
-    MisconfiguredSchemaException, ItemNotFound
+    MisconfiguredSchemaException, ItemNotFound, InconsistentItemException
+from dynamodb_meta_store.refresher import Refresher
+from dynamodb_meta_store.schema import Schema
 import logging
 import boto3
+import copy
 import decimal
+import json
+import threading
+import time
+import uuid
 
 log = logging.getLogger(__name__)
 
+# Attributes of chunked options, see DynamoDBMetaStore.set()
+CHUNKS_KEY = "_chunks"
+VERSION_KEY = "_version"
+PART_KEY = "_part"
+DATA_KEY = "_data"
+
 
 class DynamoDBMetaStore(object):
     """ DynamoDB Config Store instance """
 
+    # DynamoDB rejects items larger than 400KB
+    max_item_size = 400 * 1024
+    # Size of the chunks oversized options are split into
+    chunk_size = 350 * 1024
+    # Number of times a chunked option is read if it changes while being read
+    chunk_read_attempts = 3
+
     def __init__(
             self, table_name, store_name,
             aws_region=None, connection=None,
             store_key="_store", option_key="_option",
-            create_table=False, read_units=1, write_units=1
+            create_table=False, read_units=1, write_units=1,
+            consistent_read=False, read_your_writes=None, backend=None,
+            refresh_interval=None, refresh_options=None, schemas=None,
+            client=None, session=None
     ):
         """ Constructor for the config store
         :type table_name: str
@@ -36,13 +59,42 @@ class DynamoDBMetaStore(object):
         :param read_units: Number of read units to provision to created table
         :type write_units: int
         :param write_units: Number of write units to provision to created table
+        :type consistent_read: bool
+        :param consistent_read: Use strongly consistent reads by default
+        :type read_your_writes: int or float
+        :param read_your_writes: Number of seconds after a set() during which
+            reads of that option are strongly consistent. Disabled if None
+        :type backend: dynamodb_meta_store.backends.Backend
+        :param backend: Storage backend to use instead of a DynamoDB table
+        :type refresh_interval: int or float
+        :param refresh_interval: Refresh a local cache in the background every
+            refresh_interval seconds, see start_refresh(). Disabled if None
+        :type refresh_options: list
+        :param refresh_options: Options to refresh, the full store if None
+        :type schemas: dict
+        :param schemas: Schemas of options, see register_schema();
+            {"option": spec}
+        :type client: botocore.client.DynamoDB
+        :param client: Low-level DynamoDB client used for options with a schema.
+            Created from the session if None
+        :type session: boto3.session.Session
+        :param session: Session to create the connection and the client with.
+            The boto3 default session is used if no connection is given either.
+            Options with a schema are read and written through the connection
+            if there is neither client nor session
         :returns: None
         """
-        if connection is None:
-            if aws_region is None:
-                self.connection = boto3.resource("dynamodb")
-            else:
-                self.connection = boto3.resource("dynamodb", aws_region)
+        if backend is not None:
+            if connection is not None or aws_region is not None or session is not None:
+                raise Exception(
+                    "Parameters backend and connection, aws_region or session cannot be defined together"
+                )
+            self.connection = None
+        elif connection is None:
+            if session is None:
+                # The session boto3.resource() uses, see boto3.setup_default_session()
+                session = boto3._get_default_session()
+            self.connection = session.resource("dynamodb", region_name=aws_region)
         else:
             if aws_region is not None:
                 raise Exception("Parameters connection and aws_region cannot be defined together")
@@ -54,7 +106,35 @@ class DynamoDBMetaStore(object):
         self.create_table = create_table
         self.read_units = read_units
         self.write_units = write_units
-        self._initialize_table()
+        self.client = client
+        self._created_client = False
+        self.session = session
+        self.consistent_read = consistent_read
+        self.read_your_writes = read_your_writes
+        self._recent_writes = {}
+        self.refresher = None
+        self._cache = {}
+        self._cache_complete = False
+        self._cache_lock = threading.Lock()
+        # Sequence numbers of writes, so that reads started before a write
+        # do not overwrite the cached value of that write
+        self._write_seq = 0
+        self._written = {}
+        self._refreshed_seq = 0
+        self._refresh_store = True
+        # Options refreshed when not refreshing the full store: the options
+        # given to start_refresh(), and the options cached since
+        self._refresh_requested = set()
+        self._refresh_options = set()
+        self.schemas = {}
+        for option, spec in (schemas or {}).items():
+            self.register_schema(option, spec)
+        if backend is None:
+            self._initialize_table()
+        else:
+            self._initialize_backend(backend)
+        if refresh_interval is not None:
+            self.start_refresh(refresh_interval, options=refresh_options)
 
     def _initialize_table(self):
         """ Initialize the table
@@ -91,6 +171,35 @@ class DynamoDBMetaStore(object):
                 raise e
 
         self.table.reload()
+        self.backend = DynamoDBBackend(self.connection, self.table, client=self._get_client())
+
+    def _get_client(self):
+        """ Get the low-level client used for options with a schema
+        The client of the connection cannot be used, boto3 resources register
+        their (de)serialization on it. A client is created from the session,
+        with the region, endpoint and configuration of the connection, so that
+        both use the same credentials.
+        :returns: botocore.client.DynamoDB -- The client, None if there is neither client nor session
+        """
+        if self.client is None and self.session is not None:
+            meta = self.connection.meta.client.meta
+            self.client = self.session.client(
+                "dynamodb", region_name=meta.region_name,
+                endpoint_url=meta.endpoint_url, config=meta.config
+            )
+            self._created_client = True
+        return self.client
+
+    def _initialize_backend(self, backend):
+        """ Initialize a custom storage backend
+        :type backend: dynamodb_meta_store.backends.Backend
+        :param backend: Storage backend to use
+        :returns: None
+        """
+        if not backend.validate_schema(self.store_key, self.option_key):
+            raise MisconfiguredSchemaException
+        self.table = None
+        self.backend = backend
 
     def _create_table(self):
         """ Create a new table
@@ -132,57 +241,484 @@ class DynamoDBMetaStore(object):
         """ Reload the config store
         :returns: None
         """
-        self._initialize_store()
+        if self.connection is not None:
+            self._initialize_table()
+
+    def register_schema(self, option, spec):
+        """ Register the schema of an option
+        The option is then set and returned as an object of the schema
+        class, encoded and decoded by functions generated for its fields.
+        :type option: str
+        :param option: Name of the configuration option
+        :type spec: type or dict
+        :param spec: Dataclass, or dictionary mapping field names to types;
+            {"host": str, "port": int}. A class with __slots__ is generated
+            for dictionaries
+        :returns: type -- The schema class
+        """
+        schema = Schema(option, spec)
+        self.schemas[option] = schema
+        with self._cache_lock:
+            self._cache.pop(option, None)
+        return schema.cls
 
     def set(self, option, item):
         """ Upsert a config item
         A write towards DynamoDB will be executed when this method is called.
+        Options larger than max_item_size are stored as JSON split into
+        chunks, see _set_chunks(). Their data must be JSON serializable.
         :type option: str
         :param option: Name of the configuration option
         :type item: dict
-        :param item: Dictionary with all option data
+        :param item: Dictionary with all option data, or object of the
+            schema class if the option has a schema
         :returns: bool -- True if the data was stored successfully
         """
+        schema = self.schemas.get(option)
+        if schema is not None:
+            value = schema.coerce(item)
+            old = self._set_typed(option, schema, value)
+        else:
+            item[self.store_key] = self.store_name
+            item[self.option_key] = option
+            value = {
+                key: value
+                for key, value in item.items()
+                if key not in (self.store_key, self.option_key)
+            }
+
+            if item_size(item) > self.max_item_size:
+                old = self._set_chunks(option, item)
+            else:
+                old = self.backend.replace(item)
+        if old is not None and CHUNKS_KEY in old:
+            # The replaced option was chunked, its chunks are not needed anymore
+            self.backend.batch_write(keys=self._chunk_keys(option, old))
+
+        if self.read_your_writes is not None:
+            self._recent_writes[option] = time.monotonic()
+        with self._cache_lock:
+            self._write_seq += 1
+            self._written[option] = self._write_seq
+            if self.refresher is not None:
+                self._cache[option] = replace_decimals(copy.deepcopy(value))
+                if not self._refresh_store:
+                    self._refresh_options.add(option)
+        return True
+
+    def _set_typed(self, option, schema, value):
+        """ Store an option with a schema
+        :type option: str
+        :param option: Name of the configuration option
+        :type schema: dynamodb_meta_store.schema.Schema
+        :param schema: Schema of the option
+        :type value: object
+        :param value: Object of the schema class
+        :returns: dict -- The replaced item, None if there was none
+        """
+        if self.backend.supports_wire:
+            wire = schema.to_wire(value)
+            wire[self.store_key] = {"S": self.store_name}
+            wire[self.option_key] = {"S": option}
+            if item_size(wire) <= self.max_item_size:
+                return self._wire_header(self.backend.put_wire(wire))
+
+        item = schema.to_item(value)
         item[self.store_key] = self.store_name
         item[self.option_key] = option
+        if item_size(item) > self.max_item_size:
+            return self._set_chunks(option, item)
+        return self.backend.replace(item)
 
-        response = self.table.put_item(Item=item)
-        if response["ResponseMetadata"]["HTTPStatusCode"] == 200:
-            return True
-        else:
-            return False
+    def _wire_header(self, wire):
+        """ Get the chunk attributes of an item in the wire format
+        :type wire: dict
+        :param wire: Item in the wire format, or None
+        :returns: dict -- Header attributes, None if the item is not chunked
+        """
+        if wire is None or CHUNKS_KEY not in wire:
+            return None
+        return {CHUNKS_KEY: int(wire[CHUNKS_KEY]["N"]), VERSION_KEY: wire[VERSION_KEY]["S"]}
+
+    def _decode(self, option, data):
+        """ Convert option data into an object of its schema class
+        :type option: str
+        :param option: Name of the configuration option
+        :type data: dict
+        :param data: Option data, without keys
+        :returns: object -- Object of the schema class, data if the option has no schema
+        """
+        schema = self.schemas.get(option)
+        if schema is None:
+            return data
+        return schema.from_item(data)
+
+    def _chunk_prefix(self, option, version):
+        """ Get the prefix of the option key of the chunks of an option
+        :type option: str
+        :param option: Name of the configuration option
+        :type version: str
+        :param version: Version of the chunked option
+        :returns: str -- Option key prefix
+        """
+        return "%s#%s#" % (option, version)
+
+    def _chunk_keys(self, option, header):
+        """ Get the keys of the chunks of an option
+        :type option: str
+        :param option: Name of the configuration option
+        :type header: dict
+        :param header: Header item of the chunked option
+        :returns: list -- List of keys
+        """
+        prefix = self._chunk_prefix(option, header[VERSION_KEY])
+        return [
+            {self.store_key: self.store_name, self.option_key: "%s%d" % (prefix, part)}
+            for part in range(int(header[CHUNKS_KEY]))
+        ]
+
+    def _set_chunks(self, option, item):
+        """ Store an option split into chunks
+        The option data is serialized to JSON and split into items with the
+        option keys "<option>#<version>#<part>". Once all chunks are written,
+        the option item is replaced by a header pointing to the new version.
+        Readers therefore always see a complete version, either the old or
+        the new one.
+        :type option: str
+        :param option: Name of the configuration option
+        :type item: dict
+        :param item: Dictionary with all option data, including keys
+        :returns: dict -- The replaced item, None if there was none
+        """
+        data = {
+            key: value
+            for key, value in item.items()
+            if key not in (self.store_key, self.option_key)
+        }
+        # Reject floats like options under the size limit, to_dynamodb copies the data
+        payload = json.dumps(replace_decimals(to_dynamodb(data)), separators=(",", ":"))
+        version = uuid.uuid4().hex
+        prefix = self._chunk_prefix(option, version)
+        chunks = [
+            {
+                self.store_key: self.store_name,
+                self.option_key: "%s%d" % (prefix, part),
+                PART_KEY: part,
+                DATA_KEY: payload[start:start + self.chunk_size]
+            }
+            for part, start in enumerate(range(0, len(payload), self.chunk_size))
+        ]
+        self.backend.batch_write(items=chunks)
+
+        return self.backend.replace({
+            self.store_key: self.store_name,
+            self.option_key: option,
+            CHUNKS_KEY: len(chunks),
+            VERSION_KEY: version
+        })
+
+    def _read_chunks(self, option, header, consistent_read=False, chunks=None):
+        """ Reassemble a chunked option
+        The chunks are read with a single range query. If the option was
+        replaced in the meantime, the read starts over from the new header.
+        :type option: str
+        :param option: Name of the configuration option
+        :type header: dict
+        :param header: Header item of the chunked option
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read
+        :type chunks: list
+        :param chunks: Chunk items already read, queried if None
+        :returns: dict -- Dictionary with all data; {"key": "value"}
+        """
+        key = {self.store_key: self.store_name, self.option_key: option}
+        for _ in range(self.chunk_read_attempts):
+            if chunks is None:
+                chunks = self.backend.query(
+                    self.store_key, self.store_name, consistent_read=consistent_read,
+                    range_key=self.option_key,
+                    range_prefix=self._chunk_prefix(option, header[VERSION_KEY])
+                )
+            if len(chunks) == int(header[CHUNKS_KEY]):
+                chunks = sorted(chunks, key=lambda chunk: int(chunk[PART_KEY]))
+                payload = "".join(chunk[DATA_KEY] for chunk in chunks)
+                return json.loads(payload, parse_float=decimal.Decimal)
+
+            chunks = None
+            header = self.backend.get(key, consistent_read=True)
+            if header is None:
+                raise ItemNotFound("Item %s not found" % option)
+            if CHUNKS_KEY not in header:
+                return self._item_data(option, header)
+
+        raise InconsistentItemException("Item %s changed while being read" % option)
+
+    def _item_data(self, option, item, consistent_read=False):
+        """ Get the option data of an item
+        :type option: str
+        :param option: Name of the configuration option
+        :type item: dict
+        :param item: Item read from the backend
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read for chunks
+        :returns: dict -- Dictionary with all data; {"key": "value"}
+        """
+        if CHUNKS_KEY in item:
+            return self._read_chunks(option, item, consistent_read=consistent_read)
+        item.pop(self.store_key, None)
+        item.pop(self.option_key, None)
+        return item
+
+    def start_refresh(self, interval, options=None):
+        """ Serve get() from a local cache refreshed in the background
+        A daemon thread re-reads the cached options every interval seconds.
+        Cached values are served while they are being refreshed, and kept
+        if the refresh fails, e.g. when DynamoDB is throttling or
+        unreachable. Options missing from the cache are read from DynamoDB
+        and cached. get() with consistent_read=True always reads from
+        DynamoDB, falling back to the cached value if the read fails.
+        :type interval: int or float
+        :param interval: Number of seconds between two refreshes
+        :type options: list
+        :param options: Options to refresh, the full store if None. Options
+            cached by get() or set() are refreshed as well, until they are
+            found missing from the store
+        :returns: None
+        """
+        self.stop_refresh()
+        self._refresh_store = options is None
+        self._refresh_requested = set(options or [])
+        self._refresh_options = set(options or [])
+        self.refresher = Refresher(self, interval)
+        self.refresher.start()
+
+    def stop_refresh(self):
+        """ Stop the background refresh and drop the local cache
+        :returns: None
+        """
+        if self.refresher is not None:
+            self.refresher.stop()
+            self.refresher = None
+        with self._cache_lock:
+            self._cache = {}
+            self._cache_complete = False
+
+    def refresh(self):
+        """ Re-read the cached options from DynamoDB
+        Called periodically by the background refresher. If options were
+        written since the previous refresh, a strongly consistent read is
+        used so that the refresh does not read data older than the writes.
+        :returns: None
+        """
+        with self._cache_lock:
+            started = self._write_seq
+            consistent_read = True if started > self._refreshed_seq else None
+            self._refreshed_seq = started
+            options = list(self._refresh_options)
 
-    def get(self, option=None, keys=None):
+        if self._refresh_store:
+            self._load(consistent_read=consistent_read)
+            return
+
+        if not options:
+            return
+        items = self.get_options(options, consistent_read=consistent_read)
+        with self._cache_lock:
+            self._update_cache(items, started, options)
+
+    def _update_cache(self, items, started, options=None):
+        """ Update the cache with options read from DynamoDB
+        Options written after the read started keep their cached value,
+        the read may have returned data older than the write.
+        The cache lock must be held.
+        :type items: dict
+        :param items: Options read; {"option": {"key": "value"}}
+        :type started: int
+        :param started: Write sequence number when the read started
+        :type options: list
+        :param options: Options that were read, options missing from items
+            are removed from the cache. Replace the full cache if None.
+            When refreshing options only, the options cached are refreshed
+            from then on, and the missing ones are not anymore
+        :returns: dict -- Options read, with values written in the meantime
+        """
+        written = {option for option, seq in self._written.items() if seq > started and option in self._cache}
+        for option in written:
+            items[option] = self._cache[option]
+
+        if options is None:
+            self._cache = items
+            self._cache_complete = True
+            return items
+
+        for option in options:
+            if option in written:
+                continue
+            if option in items:
+                self._cache[option] = items[option]
+                if not self._refresh_store:
+                    self._refresh_options.add(option)
+            else:
+                self._cache.pop(option, None)
+                if option not in self._refresh_requested:
+                    self._refresh_options.discard(option)
+        return {option: items[option] for option in options if option in items}
+
+    def _load(self, option=None, consistent_read=None):
+        """ Read an option, or the full store, and update the cache
+        :type option: str
+        :param option: Name of the configuration option, all options if None
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read. Store default if None
+        :returns: dict -- Dictionary with all data; {"key": "value"}
+        """
+        with self._cache_lock:
+            started = self._write_seq
+
+        if option is None:
+            items = self._get_store(consistent_read)
+            with self._cache_lock:
+                if self._refresh_store:
+                    items = self._update_cache(items, started)
+                else:
+                    # Cached options missing from the store were removed
+                    items = self._update_cache(items, started, list(set(items) | set(self._cache)))
+                return copy.deepcopy(items)
+
+        try:
+            items = {option: replace_decimals(self.get_option(option, consistent_read=consistent_read))}
+        except ItemNotFound:
+            items = {}
+        with self._cache_lock:
+            items = self._update_cache(items, started, [option])
+            if option not in items:
+                raise ItemNotFound("Item %s not found" % option)
+            return copy.deepcopy(items[option])
+
+    def _get_cached(self, option=None, keys=None, consistent_read=None):
+        """ Get a config item from the local cache
+        The item is read from DynamoDB if it is not cached or if
+        consistent_read is True. The cached value is served if that read fails.
+        :type option: str
+        :param option: Name of the configuration option, all options if None
+        :type keys: list
+        :param keys: List of keys to return (used to get subsets of keys)
+        :type consistent_read: bool
+        :param consistent_read: Read from DynamoDB with a strongly consistent read
+        :returns: dict -- Dictionary with all data; {"key": "value"}
+        """
+        with self._cache_lock:
+            if option:
+                cached = self._cache.get(option)
+            elif self._cache_complete:
+                cached = self._cache
+            else:
+                cached = None
+            cached = copy.deepcopy(cached)
+
+        if cached is None or consistent_read:
+            try:
+                cached = self._load(option, consistent_read)
+            except ItemNotFound:
+                raise
+            except Exception:
+                if cached is None:
+                    raise
+                log.warning("Could not read %s, serving the cached value", option or self.store_name, exc_info=True)
+
+        if option:
+            return select_keys(cached, keys)
+        return cached
+
+    def _consistent_read(self, consistent_read, option=None):
+        """ Resolve the read mode for a request
+        An explicit consistent_read always wins. Otherwise a strongly
+        consistent read is used if the option (any option if None) was
+        written by this instance within the read_your_writes window,
+        falling back to the store default.
+        :type consistent_read: bool
+        :param consistent_read: Read mode requested by the caller, or None
+        :type option: str
+        :param option: Name of the configuration option, all options if None
+        :returns: bool -- True if a strongly consistent read should be used
+        """
+        if consistent_read is not None:
+            return consistent_read
+        if self.read_your_writes is not None and self._recent_writes:
+            deadline = time.monotonic() - self.read_your_writes
+            # Forget writes that fell out of the window
+            for name, written in list(self._recent_writes.items()):
+                if written < deadline:
+                    self._recent_writes.pop(name, None)
+            if option is None:
+                if self._recent_writes:
+                    return True
+            elif option in self._recent_writes:
+                return True
+        return self.consistent_read
+
+    def get(self, option=None, keys=None, consistent_read=None):
         """ Get a config item
         A query towards DynamoDB will always be executed when this
-        method is called.
+        method is called, unless the background refresh is running.
         An boto.dynamodb2.exceptions.ItemNotFound will be thrown if the config
         option does not exist.
         :type option: str
         :param option: Name of the configuration option, all options if None
         :type keys: list
         :param keys: List of keys to return (used to get subsets of keys)
-        :returns: dict -- Dictionary with all data; {"key": "value"}
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read. Store default if None
+        :returns: dict -- Dictionary with all data; {"key": "value"}.
+            Object of the schema class for options with a schema and no keys
         """
+        if self.refresher is not None:
+            return self._get_cached(option=option, keys=keys, consistent_read=consistent_read)
         if option:
-            items = self.get_option(option=option, keys=keys)
+            items = self.get_option(option=option, keys=keys, consistent_read=consistent_read)
             return replace_decimals(items)
         else:
-            items = {}
-            partition_filter = {"key": self.store_key, "value": self.store_name}
-            response_items = self.query(partition_filter=partition_filter)
-            for item in response_items:
-                option = item[self.option_key]
+            return self._get_store(consistent_read=consistent_read)
+
+    def _get_store(self, consistent_read=None):
+        """ Get all options of the store
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read. Store default if None
+        :returns: dict -- Dictionary with all options; {"option": {"key": "value"}}
+        """
+        items = {}
+        chunks = {}
+        consistent_read = self._consistent_read(consistent_read)
+        partition_filter = {"key": self.store_key, "value": self.store_name}
+        response_items = self.query(
+            partition_filter=partition_filter,
+            consistent_read=consistent_read
+        )
+        for item in response_items:
+            option = item[self.option_key]
 
-                # Remove metadata
-                del item[self.store_key]
-                del item[self.option_key]
+            # Remove metadata
+            del item[self.store_key]
+            del item[self.option_key]
 
+            if PART_KEY in item:
+                # Group chunks by option and version
+                prefix = option[:option.rindex("#") + 1]
+                chunks.setdefault(prefix, []).append(item)
+            else:
                 items[option] = {k: v for k, v in item.items()}
 
-            return replace_decimals(items)
+        for option, item in items.items():
+            if CHUNKS_KEY in item:
+                prefix = self._chunk_prefix(option, item[VERSION_KEY])
+                item = self._read_chunks(
+                    option, item, consistent_read=consistent_read, chunks=chunks.get(prefix, [])
+                )
+            items[option] = self._decode(option, item)
+
+        return replace_decimals(items)
 
-    def get_option(self, option, keys=None):
+    def get_option(self, option, keys=None, consistent_read=None):
         """ Get a specific option from the store.
         A query towards DynamoDB will always be executed when this
         method is called.
@@ -192,34 +728,79 @@ class DynamoDBMetaStore(object):
         :param option: Name of the configuration option
         :type keys: list
         :param keys: List of keys to return (used to get subsets of keys)
-        :returns: dict -- Dictionary with all data; {"key": "value"}
+        :type consistent_read: bool
+        :param consistent_read: Use a strongly consistent read. Store default if None
+        :returns: dict -- Dictionary with all data; {"key": "value"}.
+            Object of the schema class for options with a schema and no keys
         """
 
-        response = self.table.get_item(
-            Key={
+        consistent_read = self._consistent_read(consistent_read, option)
+        schema = self.schemas.get(option)
+        if schema is not None and self.backend.supports_wire:
+            wire = self.backend.get_wire(
+                {
+                    self.store_key: {"S": self.store_name},
+                    self.option_key: {"S": option}
+                },
+                consistent_read=consistent_read,
+            )
+            if wire is None:
+                raise ItemNotFound("Item %s not found" % option)
+            header = self._wire_header(wire)
+            if header is None:
+                return select_keys(schema.from_wire(wire), keys)
+            item = self._read_chunks(option, header, consistent_read=consistent_read)
+            return select_keys(schema.from_item(item), keys)
+
+        item = self.backend.get(
+            {
                 self.store_key: self.store_name,
                 self.option_key: option
             },
+            consistent_read=consistent_read,
         )
-        try:
-            item = response["Item"]
-        except KeyError:
-            raise ItemNotFound("Item %s not found" % self.option)
+        if item is None:
+            raise ItemNotFound("Item %s not found" % option)
 
-        del item[self.store_key]
-        del item[self.option_key]
+        item = self._item_data(option, item, consistent_read=consistent_read)
 
-        if keys:
-            return {
-                key: value
-                for key, value in item.items()
-                if key in keys
-            }
-        else:
-            return {key: value for key, value in item.items()}
+        return select_keys(self._decode(option, item), keys)
+
+    def get_options(self, options, keys=None, consistent_read=None):
+        """ Get several options from the store with batch reads.
+        Options that do not exist are left out of the result. Duplicate
+        options are read once.
+        :type options: list
+        :param options: Names of the configuration options
+        :type keys: list
+        :param keys: List of keys to return (used to get subsets of keys)
+        :type consistent_read: bool
+        :param consistent_read: Use strongly consistent reads. Store default if None
+        :returns: dict -- Dictionary with all options; {"option": {"key": "value"}}
+        """
+        # DynamoDB rejects batch reads with duplicate keys
+        options = list(dict.fromkeys(options))
+        consistent_read = any(
+            self._consistent_read(consistent_read, option) for option in options
+        )
+        response_items = self.backend.batch_get(
+            [
+                {self.store_key: self.store_name, self.option_key: option}
+                for option in options
+            ],
+            consistent_read=consistent_read
+        )
+        items = {}
+        for item in response_items:
+            option = item[self.option_key]
+            item = self._item_data(option, item, consistent_read=consistent_read)
+            items[option] = select_keys(self._decode(option, item), keys)
+
+        return replace_decimals(items)
 
     def query(
-        self, partition_filter, total_items=None, start_key=None
+        self, partition_filter, total_items=None, start_key=None,
+        consistent_read=None
     ):
         """
         Query for an item with or without using global secondary index
@@ -230,50 +811,50 @@ class DynamoDBMetaStore(object):
         @partition_key: Dict containing key and val of partition key
         e.g. {"name": "date", "value": "2017-02-12"}
         @index_name (optional): Name of the Global Secondary Index
+        @consistent_read (optional): Use a strongly consistent read.
+        Store default if None
         """
 
         pk = partition_filter["key"]
         pkv = partition_filter["value"]
-        if not start_key:
-            response = self.table.query(
-                KeyConditionExpression=Key(pk).eq(pkv)
-            )
-        else:
-            response = self.table.query(
-                KeyConditionExpression=Key(pk).eq(pkv),
-                ExclusiveStartKey=start_key
-            )
+        if consistent_read is None:
+            consistent_read = self.consistent_read
+        items = self.backend.query(
+            pk, pkv, consistent_read=consistent_read, start_key=start_key
+        )
         if not total_items:
-            total_items = response["Items"]
-        else:
-            total_items.extend(response["Items"])
-        if response.get("LastEvaluatedKey"):
-            start_key = response["LastEvaluatedKey"]
-            return_items = self.query_item(
-                partition_key=partition_filter, total_items=total_items,
-                start_key=start_key
-            )
-            return return_items
-        else:
-            return total_items
+            return items
+        total_items.extend(items)
+        return total_items
 
     def __del__(self):
-        self.connection.meta.client._endpoint.http_session.close()  # closing a boto3 resource
-
-
-def replace_decimals(obj):
-    if isinstance(obj, list):
-        for i in range(len(obj)):
-            obj[i] = replace_decimals(obj[i])
-        return obj
-    elif isinstance(obj, dict):
-        for k, v in obj.items():
-            obj[k] = replace_decimals(v)
-        return obj
-    elif isinstance(obj, decimal.Decimal):
-        if obj % 1 == 0:
-            return int(obj)
-        else:
-            return float(obj)
-    else:
-        return obj
+        if self.refresher is not None:
+            self.refresher.stop()
+        if self.connection is not None:
+            self.connection.meta.client._endpoint.http_session.close()  # closing a boto3 resource
+        if self._created_client:
+            self.client._endpoint.http_session.close()
+
+
+def item_size(item):
+    """ Estimate the size of an item as stored by DynamoDB
+    :type item: dict
+    :param item: Item including its keys
+    :returns: int -- Approximate size in bytes
+    """
+    return len(json.dumps(item, default=str, separators=(",", ":")).encode("utf-8"))
+
+
+def select_keys(value, keys):
+    """ Get a subset of the keys of an option
+    :type value: dict or object
+    :param value: Option data, or object of the option schema class
+    :type keys: list
+    :param keys: List of keys to return, all keys if None
+    :returns: dict or object -- Dictionary with the selected keys, value if keys is None
+    """
+    if not keys:
+        return value
+    if isinstance(value, dict):
+        return {key: item for key, item in value.items() if key in keys}
+    return {key: getattr(value, key) for key in keys if hasattr(value, key)}
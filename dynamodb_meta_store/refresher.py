@@ -0,0 +1,47 @@
+import logging
+import threading
+import weakref
+
+log = logging.getLogger(__name__)
+
+
+class Refresher(threading.Thread):
+    """ Daemon thread refreshing the cache of a DynamoDBMetaStore
+
+    Only a weak reference to the store is kept, so the thread stops by
+    itself once the store is garbage collected.
+    """
+
+    def __init__(self, store, interval):
+        """ Constructor for the refresher
+        :type store: dynamodb_meta_store.DynamoDBMetaStore
+        :param store: Store to refresh
+        :type interval: int or float
+        :param interval: Number of seconds between two refreshes
+        :returns: None
+        """
+        super(Refresher, self).__init__(name="dynamodb-meta-store-refresher")
+        self.daemon = True
+        self.store = weakref.ref(store)
+        self.interval = interval
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            store = self.store()
+            if store is None:
+                return
+            try:
+                store.refresh()
+            except Exception:
+                # Keep serving the last known values until the next attempt
+                log.warning("Could not refresh store %s", store.store_name, exc_info=True)
+            del store
+
+    def stop(self):
+        """ Stop the refresher and wait for it to finish
+        :returns: None
+        """
+        self._stopped.set()
+        if self.is_alive() and self is not threading.current_thread():
+            self.join()
@@ -0,0 +1,258 @@
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from dynamodb_meta_store.backends import replace_decimals, to_dynamodb
+import decimal
+import keyword
+import math
+import re
+import typing
+
+try:
+    import dataclasses
+except ImportError:  # Python 3.6
+    dataclasses = None
+
+_deserializer = TypeDeserializer()
+_serializer = TypeSerializer()
+
+# Expressions converting a value v of a field type:
+# (from wire format, to wire format, from item, to item)
+CONVERTERS = {
+    str: ("v['S']", "{'S': v}", "str(v)", "v"),
+    int: ("int(v['N'])", "{'N': str(v)}", "to_int(v)", "v"),
+    float: ("float(v['N'])", "{'N': repr(v)}", "float(v)", "decimal.Decimal(repr(v))"),
+    bool: ("v['BOOL']", "{'BOOL': v}", "v", "v"),
+    bytes: ("bytes(v['B'])", "{'B': v}", "bytes(v)", "v"),
+}
+
+# Any other type goes through the generic boto3 (de)serializers
+GENERIC_CONVERTER = (
+    "replace_decimals(deserializer.deserialize(v))",
+    "serializer.serialize(to_dynamodb(v))",
+    "replace_decimals(v)",
+    "to_dynamodb(v)",
+)
+
+# Wire format type of each field type. Values stored with another type,
+# e.g. written without the schema, are decoded with the generic deserializer
+WIRE_TYPES = {str: "S", int: "N", float: "N", bool: "BOOL", bytes: "B"}
+
+# Conditions rejecting values that cannot be encoded as the field type:
+# (condition on v, expected value)
+CHECKS = {
+    str: ("not isinstance(v, str)", "a str"),
+    bool: ("not isinstance(v, bool)", "a bool"),
+    bytes: ("not isinstance(v, (bytes, bytearray))", "bytes"),
+    # bool is a subclass of int, but stored as BOOL
+    int: ("v.__class__ is bool or not isinstance(v, int)", "an int"),
+    # DynamoDB numbers have no NaN or infinity
+    float: (
+        "v.__class__ is bool or not isinstance(v, (int, float)) or not math.isfinite(v)",
+        "a finite float"
+    ),
+}
+
+
+def to_int(v):
+    """ Convert a number, as returned by boto3 resources, to an int
+    Fractional numbers raise a ValueError, like int() does for the number
+    strings of the wire format, instead of being truncated.
+    :type v: decimal.Decimal or str
+    :param v: Number to convert
+    :returns: int -- The number
+    """
+    if isinstance(v, str):
+        return int(v)
+    if v % 1:
+        raise ValueError("%r is not an integer" % (v,))
+    return int(v)
+
+
+class Schema(object):
+    """ Typed schema of an option
+
+    Encode and decode functions specialised for the fields of the option
+    are generated once, when the schema is created. They convert directly
+    between typed objects and items, either in the DynamoDB wire format
+    ({"port": {"N": "80"}}) or as returned by boto3 resources ({"port": Decimal(80)}).
+    Fields that are missing or None are left out of the encoded items.
+    Values that cannot be stored as their field type, e.g. bools in int
+    fields or non-finite floats, are rejected with a TypeError.
+    Stored values of another type than their field are decoded like
+    options without a schema, then converted to the field type. Fractional
+    numbers in int fields raise a ValueError.
+    """
+
+    def __init__(self, name, spec):
+        """ Constructor for the schema
+        :type name: str
+        :param name: Name of the option
+        :type spec: type or dict
+        :param spec: Dataclass, or dictionary mapping field names to types.
+            A class with __slots__ is generated for dictionaries
+        :returns: None
+        """
+        self.name = name
+        if dataclasses is not None and dataclasses.is_dataclass(spec):
+            hints = typing.get_type_hints(spec)
+            self.fields = [(field.name, hints.get(field.name)) for field in dataclasses.fields(spec) if field.init]
+            self.cls = spec
+        elif isinstance(spec, dict):
+            self.fields = list(spec.items())
+            self.cls = None
+        else:
+            raise TypeError("Schema of %s must be a dataclass or a dict, not %r" % (name, spec))
+
+        for field, _ in self.fields:
+            if not isinstance(field, str) or not field.isidentifier() or keyword.iskeyword(field):
+                raise ValueError("Field %r of %s is not a valid identifier" % (field, name))
+        if self.cls is None:
+            self.cls = make_class(name, [field for field, _ in self.fields])
+
+        self.from_wire = self._compile_decoder(0)
+        self.to_wire = self._compile_encoder(1)
+        self.from_item = self._compile_decoder(2)
+        self.to_item = self._compile_encoder(3)
+
+    def _field_type(self, field_type):
+        """ Get the type a field is converted as
+        Optional[X] is converted as X, None values are never encoded.
+        :type field_type: type
+        :param field_type: Type of the field
+        :returns: type -- Type to convert the field as
+        """
+        if getattr(field_type, "__origin__", None) is typing.Union:
+            args = [arg for arg in field_type.__args__ if arg is not type(None)]
+            if len(args) == 1:
+                return args[0]
+        return field_type
+
+    def _converter(self, field_type, index):
+        """ Get the conversion expression for a field type
+        :type field_type: type
+        :param field_type: Type of the field
+        :type index: int
+        :param index: Index of the conversion in CONVERTERS
+        :returns: str -- Python expression converting v
+        """
+        return CONVERTERS.get(self._field_type(field_type), GENERIC_CONVERTER)[index]
+
+    def _compile(self, name, lines):
+        """ Compile a generated function
+        :type name: str
+        :param name: Name of the function
+        :type lines: list
+        :param lines: Source code lines of the function
+        :returns: function -- The compiled function
+        """
+        namespace = {
+            "cls": self.cls,
+            "decimal": decimal,
+            "math": math,
+            "deserializer": _deserializer,
+            "serializer": _serializer,
+            "replace_decimals": replace_decimals,
+            "to_dynamodb": to_dynamodb,
+            "to_int": to_int,
+        }
+        exec("\n".join(lines), namespace)
+        return namespace[name]
+
+    def _compile_decoder(self, index):
+        """ Generate a function converting an item into an object
+        :type index: int
+        :param index: Index of the conversion in CONVERTERS
+        :returns: function -- Decoder
+        """
+        lines = ["def decode(item):", "    kwargs = {}"]
+        for field, field_type in self.fields:
+            lines.extend([
+                "    v = item.get(%r)" % field,
+                "    if v is not None:",
+            ])
+            wire_type = WIRE_TYPES.get(self._field_type(field_type))
+            if index == 0 and wire_type is not None:
+                lines.extend([
+                    "        if %r in v:" % wire_type,
+                    "            kwargs[%r] = %s" % (field, self._converter(field_type, 0)),
+                    "        else:",
+                    "            v = deserializer.deserialize(v)",
+                    "            if v is not None:",
+                    "                kwargs[%r] = %s" % (field, self._converter(field_type, 2)),
+                ])
+            else:
+                lines.append("        kwargs[%r] = %s" % (field, self._converter(field_type, index)))
+        lines.append("    return cls(**kwargs)")
+        return self._compile("decode", lines)
+
+    def _compile_encoder(self, index):
+        """ Generate a function converting an object into an item
+        :type index: int
+        :param index: Index of the conversion in CONVERTERS
+        :returns: function -- Encoder
+        """
+        lines = ["def encode(obj):", "    item = {}"]
+        for field, field_type in self.fields:
+            lines.extend([
+                "    v = obj.%s" % field,
+                "    if v is not None:",
+            ])
+            check = CHECKS.get(self._field_type(field_type))
+            if check is not None:
+                condition, expected = check
+                message = "Field %s of %s must be %s, not " % (field, self.name, expected)
+                lines.extend([
+                    "        if %s:" % condition,
+                    "            raise TypeError(%r + repr(v))" % message,
+                ])
+            lines.append("        item[%r] = %s" % (field, self._converter(field_type, index)))
+        lines.append("    return item")
+        return self._compile("encode", lines)
+
+    def coerce(self, value):
+        """ Get an object of the schema class
+        :type value: object or dict
+        :param value: Object of the schema class, or dictionary of fields
+        :returns: object -- Object of the schema class
+        """
+        if isinstance(value, self.cls):
+            return value
+        if isinstance(value, dict):
+            return self.cls(**value)
+        raise TypeError("Option %s must be a %s or a dict, not %r" % (self.name, self.cls.__name__, value))
+
+
+def make_class(name, fields):
+    """ Generate a class with __slots__ for the fields of an option
+    :type name: str
+    :param name: Name of the option
+    :type fields: list
+    :param fields: Names of the fields
+    :returns: type -- Class with an __init__ taking all fields as optional
+        arguments, __repr__ and __eq__
+    """
+    class_name = "".join(part.capitalize() for part in re.split(r"\W+|_", name) if part) or "Option"
+    if not class_name.isidentifier():
+        class_name = "Option" + class_name
+
+    lines = ["def __init__(self, %s):" % ", ".join("%s=None" % field for field in fields)]
+    lines.extend("    self.%s = %s" % (field, field) for field in fields)
+    lines.append("    pass")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+
+    def __repr__(self):
+        values = ", ".join("%s=%r" % (field, getattr(self, field)) for field in fields)
+        return "%s(%s)" % (class_name, values)
+
+    def __eq__(self, other):
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in fields)
+
+    return type(class_name, (object,), {
+        "__slots__": tuple(fields),
+        "__init__": namespace["__init__"],
+        "__repr__": __repr__,
+        "__eq__": __eq__,
+        "__hash__": None,
+    })
@@ -41,6 +41,7 @@ setup(
             "pre-commit",
             "flake8",
             "flake8-quotes",
+            "moto",
             "twine",
         ]
     },
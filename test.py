@@ -1,11 +1,21 @@
 from dynamodb_meta_store import DynamoDBMetaStore
-from dynamodb_meta_store.exceptions import ItemNotFound, MisconfiguredSchemaException
+from dynamodb_meta_store.backends import DynamoDBBackend, InMemoryBackend
+from dynamodb_meta_store.exceptions import ItemNotFound, MisconfiguredSchemaException, \
+    InconsistentItemException, UnprocessedKeysException
 
+from unittest import mock
+
+import dataclasses
+import decimal
+import os
+import typing
 import unittest
 import boto3
+import time
 
 
-connection = boto3.resource("dynamodb", endpoint_url="http://localhost:8000")
+session = boto3.session.Session()
+connection = session.resource("dynamodb", endpoint_url="http://localhost:8000")
 
 
 class TestCustomThroughput(unittest.TestCase):
@@ -281,6 +291,889 @@ class TestGetFullStore(unittest.TestCase):
         self.table.delete()
 
 
+class TestConsistentRead(unittest.TestCase):
+
+    def setUp(self):
+
+        # Configuration options
+        self.table_name = "test"
+        self.store_name = "test"
+
+        # Instanciate the store
+        self.store = DynamoDBMetaStore(
+            connection=connection,
+            table_name=self.table_name,
+            store_name=self.store_name,
+            create_table=True,
+            read_your_writes=60
+        )
+
+        # Get an Table instance for validation
+        self.table = self.store.table
+
+        # Record the ConsistentRead parameter of every read request
+        self.requests = []
+        self.events = connection.meta.client.meta.events
+        self.events.register("before-parameter-build.dynamodb.*", self._record)
+
+    def _record(self, params, model, **kwargs):
+        if model.name in ("GetItem", "Query"):
+            self.requests.append((model.name, params.get("ConsistentRead")))
+        elif model.name == "BatchGetItem":
+            self.requests.append((model.name, params["RequestItems"][self.table_name]["ConsistentRead"]))
+
+    def test_default_is_eventually_consistent(self):
+        """ Test that reads are eventually consistent by default """
+        self.table.put_item(Item={"_store": self.store_name, "_option": "db", "port": 1})
+
+        self.store.get("db")
+        self.store.get()
+
+        self.assertEqual(self.requests, [("GetItem", False), ("Query", False)])
+
+    def test_per_call_consistent_read(self):
+        """ Test that a per-call consistent_read overrides the default """
+        self.store.set("db", {"port": 1})
+
+        self.store.get("db", consistent_read=False)
+        self.store.get("db", consistent_read=True)
+        self.store.get(consistent_read=False)
+
+        self.assertEqual(
+            self.requests,
+            [("GetItem", False), ("GetItem", True), ("Query", False)]
+        )
+
+    def test_read_your_writes(self):
+        """ Test that only recently written options are read consistently """
+        self.store.set("db", {"port": 1})
+        self.table.put_item(Item={"_store": self.store_name, "_option": "api", "port": 2})
+
+        self.assertEqual(self.store.get("db")["port"], 1)
+        self.assertEqual(self.store.get("api")["port"], 2)
+        self.store.get()
+
+        self.assertEqual(
+            self.requests,
+            [("GetItem", True), ("GetItem", False), ("Query", True)]
+        )
+
+    def test_batch_read_your_writes(self):
+        """ Test that batch reads are consistent if any option was written recently """
+        self.table.put_item(Item={"_store": self.store_name, "_option": "api", "port": 2})
+        self.store.get_options(["api"])
+        self.store.set("db", {"port": 1})
+        self.store.get_options(["api", "db"])
+
+        self.assertEqual(
+            self.requests,
+            [("BatchGetItem", False), ("BatchGetItem", True)]
+        )
+
+    def test_read_your_writes_expires(self):
+        """ Test that writes outside the window fall back to the default """
+        self.store.read_your_writes = 0
+        self.store.set("db", {"port": 1})
+
+        self.store.get("db")
+
+        self.assertEqual(self.requests, [("GetItem", False)])
+
+    def tearDown(self):
+        """ Tear down the test case """
+        self.events.unregister("before-parameter-build.dynamodb.*", self._record)
+        self.table.delete()
+
+
+class TestGetOptions(unittest.TestCase):
+
+    def setUp(self):
+
+        # Configuration options
+        self.table_name = "test"
+        self.store_name = "test"
+
+        # Instanciate the store
+        self.store = DynamoDBMetaStore(
+            connection=connection,
+            table_name=self.table_name,
+            store_name=self.store_name,
+            create_table=True
+        )
+
+        # Get an Table instance for validation
+        self.table = self.store.table
+
+    def test_get_options(self):
+        """ Test that we can retrieve several options at once """
+        self.store.set("api", {"endpoint": "http://test.com", "port": 80})
+        self.store.set("user", {"username": "luke", "password": "skywalker"})
+        self.store.set("db", {"host": "127.0.0.1", "port": 27017})
+
+        options = self.store.get_options(["api", "user", "doesnotexist"], keys=["port", "username"])
+
+        self.assertEqual(options, {"api": {"port": 80}, "user": {"username": "luke"}})
+
+    def test_get_options_duplicates(self):
+        """ Test that duplicate options are read once """
+        self.store.set("api", {"port": 80})
+
+        self.assertEqual(self.store.get_options(["api", "api"]), {"api": {"port": 80}})
+
+    def tearDown(self):
+        """ Tear down the test case """
+        self.table.delete()
+
+
+class UnprocessedConnection(object):
+    """ Connection leaving keys unprocessed a number of times """
+
+    def __init__(self, unprocessed):
+        self.unprocessed = unprocessed
+        self.requests = []
+
+    def batch_get_item(self, RequestItems):
+        self.requests.append(RequestItems)
+        if len(self.requests) <= self.unprocessed:
+            return {"Responses": {}, "UnprocessedKeys": RequestItems}
+        keys = RequestItems["test"]["Keys"]
+        return {"Responses": {"test": [dict(key) for key in keys]}, "UnprocessedKeys": {}}
+
+
+class UnprocessedTable(object):
+    name = "test"
+
+
+class TestBatchGetRetries(unittest.TestCase):
+
+    def _backend(self, unprocessed):
+        backend = DynamoDBBackend(UnprocessedConnection(unprocessed), UnprocessedTable())
+        backend.batch_backoff = 0.001
+        backend.batch_retries = 3
+        return backend
+
+    def test_retry_unprocessed_keys(self):
+        """ Test that unprocessed keys are requested again with backoff """
+        backend = self._backend(2)
+        keys = [{"_store": "test", "_option": "db"}]
+
+        start = time.monotonic()
+        self.assertEqual(backend.batch_get(keys), keys)
+        self.assertEqual(len(backend.connection.requests), 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.003)
+
+    def test_retries_exhausted(self):
+        """ Test that batch reads give up after the last retry """
+        backend = self._backend(10)
+
+        with self.assertRaises(UnprocessedKeysException):
+            backend.batch_get([{"_store": "test", "_option": "db"}])
+        self.assertEqual(len(backend.connection.requests), 4)
+
+
+class TestInMemoryBackend(unittest.TestCase):
+
+    def setUp(self):
+
+        # Instanciate the store
+        self.backend = InMemoryBackend()
+        self.store = DynamoDBMetaStore(
+            table_name="test",
+            store_name="test",
+            backend=self.backend
+        )
+
+    def test_set_and_get(self):
+        """ Test that options round trip through the backend """
+        obj = {
+            "host": "127.0.0.1",
+            "port": 27017,
+            "ratio": decimal.Decimal("0.5"),
+            "tags": ["a", "b"]
+        }
+        self.store.set("db", dict(obj))
+
+        self.assertEqual(self.store.get("db"), obj)
+        self.assertIsInstance(self.store.get("db")["ratio"], float)
+        self.assertEqual(self.store.get("db", keys=["port"]), {"port": 27017})
+        self.assertEqual(self.store.get_options(["db"]), {"db": obj})
+        with self.assertRaises(ItemNotFound):
+            self.store.get("doesnotexist")
+
+    def test_floats_are_rejected(self):
+        """ Test that floats are rejected like DynamoDB does """
+        with self.assertRaisesRegex(TypeError, "Float types are not supported"):
+            self.store.set("db", {"ratio": 0.5})
+        with self.assertRaisesRegex(TypeError, "Float types are not supported"):
+            self.store.set("db", {"ratios": [1, 0.5]})
+
+    def test_stored_items_are_isolated(self):
+        """ Test that changing returned options does not change the backend """
+        self.store.set("db", {"port": 1})
+        self.store.get("db")["port"] = 2
+
+        self.assertEqual(self.store.get("db"), {"port": 1})
+
+    def test_get_of_full_store(self):
+        """ Test that the full store is returned and other stores are not """
+        other = DynamoDBMetaStore(table_name="test", store_name="other", backend=self.backend)
+        other.set("api", {"port": 443})
+        self.store.set("user", {"username": "luke"})
+        self.store.set("api", {"port": 80})
+
+        self.assertEqual(self.store.get(), {"api": {"port": 80}, "user": {"username": "luke"}})
+        self.assertEqual(other.get(), {"api": {"port": 443}})
+
+    def test_query_is_ordered(self):
+        """ Test that queries return options ordered by option name """
+        for option in ["c", "a", "b"]:
+            self.store.set(option, {"value": option})
+
+        items = self.store.query(partition_filter={"key": "_store", "value": "test"})
+        self.assertEqual([item["_option"] for item in items], ["a", "b", "c"])
+
+        items = self.store.query(
+            partition_filter={"key": "_store", "value": "test"},
+            start_key={"_store": "test", "_option": "a"}
+        )
+        self.assertEqual([item["_option"] for item in items], ["b", "c"])
+
+    def test_misconfigured_keys(self):
+        """ Test that the store and backend keys must match """
+        with self.assertRaises(MisconfiguredSchemaException):
+            DynamoDBMetaStore(
+                table_name="test",
+                store_name="test",
+                store_key="_s",
+                backend=self.backend
+            )
+
+
+class FailingBackend(InMemoryBackend):
+    """ In-memory backend failing every read while fail is set
+
+    after_read is called once a read is done, before its result is
+    returned, to simulate writes racing with the read.
+    """
+
+    fail = False
+    after_read = None
+    consistent_read = None
+
+    def _check(self, consistent_read):
+        if self.fail:
+            raise Exception("Backend unavailable")
+        self.consistent_read = consistent_read
+
+    def _done(self, result):
+        if self.after_read is not None:
+            after_read, self.after_read = self.after_read, None
+            after_read()
+        return result
+
+    def get(self, key, consistent_read=False):
+        self._check(consistent_read)
+        return self._done(super(FailingBackend, self).get(key, consistent_read))
+
+    def query(self, hash_key, hash_value, consistent_read=False, start_key=None, range_key=None, range_prefix=None):
+        self._check(consistent_read)
+        return self._done(super(FailingBackend, self).query(
+            hash_key, hash_value, consistent_read, start_key, range_key, range_prefix
+        ))
+
+    def batch_get(self, keys, consistent_read=False):
+        self._check(consistent_read)
+        return self._done(super(FailingBackend, self).batch_get(keys, consistent_read))
+
+
+class TestRefresh(unittest.TestCase):
+
+    def setUp(self):
+
+        # Instanciate the stores, the writer bypasses the reader cache
+        self.backend = FailingBackend()
+        self.writer = DynamoDBMetaStore(table_name="test", store_name="test", backend=self.backend)
+        self.store = DynamoDBMetaStore(
+            table_name="test",
+            store_name="test",
+            backend=self.backend,
+            refresh_interval=3600
+        )
+
+    def test_serves_cached_value_until_refresh(self):
+        """ Test that cached values are served until the next refresh """
+        self.writer.set("db", {"port": 1})
+        self.assertEqual(self.store.get("db"), {"port": 1})
+
+        self.writer.set("db", {"port": 2})
+        self.writer.set("api", {"port": 3})
+        self.assertEqual(self.store.get("db"), {"port": 1})
+
+        self.store.refresh()
+        self.assertEqual(self.store.get("db"), {"port": 2})
+        self.assertEqual(self.store.get(), {"db": {"port": 2}, "api": {"port": 3}})
+        self.assertEqual(self.store.get("db", keys=["port"]), {"port": 2})
+
+    def test_consistent_read_bypasses_cache(self):
+        """ Test that consistent reads go to the backend and update the cache """
+        self.writer.set("db", {"port": 1})
+        self.store.get("db")
+        self.writer.set("db", {"port": 2})
+
+        self.assertEqual(self.store.get("db", consistent_read=True), {"port": 2})
+        self.assertEqual(self.store.get("db"), {"port": 2})
+
+    def test_set_updates_cache(self):
+        """ Test that writes through the store are visible immediately """
+        self.store.set("db", {"port": 1})
+        self.backend.fail = True
+        self.assertEqual(self.store.get("db"), {"port": 1})
+
+    def test_write_during_refresh(self):
+        """ Test that a refresh started before a write does not overwrite it """
+        self.writer.set("db", {"port": 1})
+        self.store.get()
+
+        self.backend.after_read = lambda: self.store.set("db", {"port": 2})
+        self.store.refresh()
+        self.assertEqual(self.store.get("db"), {"port": 2})
+        self.assertEqual(self.store.get(), {"db": {"port": 2}})
+
+        self.store.start_refresh(3600, options=["db"])
+        self.store.get("db")
+        self.backend.after_read = lambda: self.store.set("db", {"port": 3})
+        self.store.refresh()
+        self.assertEqual(self.store.get("db"), {"port": 3})
+
+        self.backend.after_read = lambda: self.store.set("db", {"port": 4})
+        self.assertEqual(self.store.get("db", consistent_read=True), {"port": 4})
+        self.store.refresh()
+        self.assertEqual(self.store.get("db"), {"port": 4})
+
+    def test_refresh_after_write_is_consistent(self):
+        """ Test that the first refresh after a write uses a consistent read """
+        self.writer.set("db", {"port": 1})
+        self.store.get()
+        self.store.refresh()
+        self.assertFalse(self.backend.consistent_read)
+
+        self.store.set("db", {"port": 2})
+        self.store.refresh()
+        self.assertTrue(self.backend.consistent_read)
+        self.store.refresh()
+        self.assertFalse(self.backend.consistent_read)
+
+    def test_last_known_value_on_failure(self):
+        """ Test that the last known values are served when the backend fails """
+        self.writer.set("db", {"port": 1})
+        self.store.get()
+        self.backend.fail = True
+
+        with self.assertRaises(Exception):
+            self.store.refresh()
+        self.assertEqual(self.store.get(), {"db": {"port": 1}})
+        self.assertEqual(self.store.get("db", consistent_read=True), {"port": 1})
+        with self.assertRaises(Exception):
+            self.store.get("api")
+
+    def test_refresh_options(self):
+        """ Test that only the given and read options are refreshed """
+        self.store.start_refresh(3600, options=["db"])
+        self.writer.set("db", {"port": 1})
+        self.writer.set("api", {"port": 2})
+        self.store.refresh()
+        self.assertEqual(self.store.get("api"), {"port": 2})
+
+        self.writer.set("db", {"port": 3})
+        self.writer.set("api", {"port": 4})
+        self.backend.fail = True
+        self.assertEqual(self.store.get("db"), {"port": 1})
+        self.backend.fail = False
+        self.store.refresh()
+        self.assertEqual(self.store.get("db"), {"port": 3})
+        self.assertEqual(self.store.get("api"), {"port": 4})
+
+    def test_refresh_options_set(self):
+        """ Test that options written through the store are refreshed """
+        self.store.start_refresh(3600, options=["db"])
+        self.store.set("api", {"port": 1})
+        self.writer.set("api", {"port": 2})
+
+        self.store.refresh()
+        self.assertEqual(self.store.get("api"), {"port": 2})
+
+    def test_refresh_options_full_store(self):
+        """ Test that options cached by a full store read are refreshed """
+        self.store.start_refresh(3600, options=["db"])
+        self.writer.set("user", {"name": "luke"})
+        self.writer.set("api", {"port": 1})
+        self.store.get()
+        self.writer.set("user", {"name": "leia"})
+
+        self.store.refresh()
+        self.assertEqual(self.store.get("user"), {"name": "leia"})
+
+        self.backend.batch_write(keys=[{"_store": "test", "_option": "api"}])
+        self.assertEqual(self.store.get(), {"user": {"name": "leia"}})
+        with self.assertRaises(ItemNotFound):
+            self.store.get("api")
+
+    def test_refresh_options_missing(self):
+        """ Test that options missing from the store are not refreshed anymore """
+        self.store.start_refresh(3600, options=["db"])
+        with self.assertRaises(ItemNotFound):
+            self.store.get("api")
+        self.assertEqual(self.store._refresh_options, {"db"})
+
+        self.writer.set("api", {"port": 1})
+        self.store.get("api")
+        self.backend.batch_write(keys=[{"_store": "test", "_option": "api"}])
+        self.store.refresh()
+        with self.assertRaises(ItemNotFound):
+            self.store.get("api")
+        self.assertEqual(self.store._refresh_options, {"db"})
+
+    def test_deleted_option(self):
+        """ Test that options removed from the store are removed from the cache """
+        self.writer.set("db", {"port": 1})
+        self.store.get("db")
+        self.backend._partitions.clear()
+
+        self.store.refresh()
+        with self.assertRaises(ItemNotFound):
+            self.store.get("db")
+
+    def test_background_refresh(self):
+        """ Test that the refresher thread refreshes the cache """
+        self.store.start_refresh(0.01)
+        self.writer.set("db", {"port": 1})
+        self.assertEqual(self.store.get("db"), {"port": 1})
+        self.writer.set("db", {"port": 2})
+
+        for _ in range(500):
+            if self.store.get("db") == {"port": 2}:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.store.get("db"), {"port": 2})
+
+    def test_stop_refresh(self):
+        """ Test that stopping the refresher goes back to direct reads """
+        self.writer.set("db", {"port": 1})
+        self.store.get("db")
+        self.writer.set("db", {"port": 2})
+
+        refresher = self.store.refresher
+        self.store.stop_refresh()
+        self.assertFalse(refresher.is_alive())
+        self.assertEqual(self.store.get("db"), {"port": 2})
+
+    def tearDown(self):
+        """ Tear down the test case """
+        self.store.stop_refresh()
+
+
+class TestChunking(unittest.TestCase):
+
+    def setUp(self):
+
+        # Configuration options
+        self.table_name = "test"
+        self.store_name = "test"
+
+        # Instanciate the store
+        self.store = DynamoDBMetaStore(
+            connection=connection,
+            table_name=self.table_name,
+            store_name=self.store_name,
+            create_table=True
+        )
+        self.store.max_item_size = 1024
+        self.store.chunk_size = 256
+
+        # Get an Table instance for validation
+        self.table = self.store.table
+
+        self.obj = {
+            "rules": [{"name": "rule%d" % i, "weight": i, "ratio": decimal.Decimal("0.5")} for i in range(50)],
+            "enabled": True
+        }
+
+    def _options(self):
+        response = self.table.query(
+            KeyConditionExpression="#s = :s",
+            ExpressionAttributeNames={"#s": "_store"},
+            ExpressionAttributeValues={":s": self.store_name}
+        )
+        return [item["_option"] for item in response["Items"]]
+
+    def test_set_chunks(self):
+        """ Test that oversized options are split into chunks """
+        self.store.set("flags", dict(self.obj))
+
+        header = self.table.get_item(Key={"_store": self.store_name, "_option": "flags"})["Item"]
+        self.assertNotIn("rules", header)
+        self.assertGreater(header["_chunks"], 1)
+        self.assertEqual(len(self._options()), header["_chunks"] + 1)
+
+    def test_get_chunks(self):
+        """ Test that chunked options are reassembled on every read path """
+        self.store.set("flags", dict(self.obj))
+        self.store.set("db", {"port": 1})
+
+        self.assertEqual(self.store.get("flags"), self.obj)
+        self.assertEqual(self.store.get("flags", keys=["enabled"]), {"enabled": True})
+        self.assertEqual(self.store.get(), {"flags": self.obj, "db": {"port": 1}})
+        self.assertEqual(self.store.get_options(["flags", "db"]), {"flags": self.obj, "db": {"port": 1}})
+
+    def test_replace_chunks(self):
+        """ Test that replaced chunks are deleted """
+        self.store.set("flags", dict(self.obj))
+        self.store.set("flags", dict(self.obj, enabled=False))
+        header = self.table.get_item(Key={"_store": self.store_name, "_option": "flags"})["Item"]
+        self.assertEqual(len(self._options()), header["_chunks"] + 1)
+        self.assertEqual(self.store.get("flags"), dict(self.obj, enabled=False))
+
+        self.store.set("flags", {"enabled": True})
+        self.assertEqual(self._options(), ["flags"])
+        self.assertEqual(self.store.get("flags"), {"enabled": True})
+
+    def test_large_option(self):
+        """ Test that options over the DynamoDB item size limit can be stored """
+        self.store.max_item_size = DynamoDBMetaStore.max_item_size
+        self.store.chunk_size = DynamoDBMetaStore.chunk_size
+        obj = {"payload": "x" * 500 * 1024}
+
+        self.store.set("large", dict(obj))
+        self.assertEqual(self.store.get("large"), obj)
+
+    def tearDown(self):
+        """ Tear down the test case """
+        self.table.delete()
+
+
+class TestChunkingInMemory(unittest.TestCase):
+
+    def setUp(self):
+
+        # Instanciate the store
+        self.backend = InMemoryBackend()
+        self.store = DynamoDBMetaStore(table_name="test", store_name="test", backend=self.backend)
+        self.store.max_item_size = 64
+        self.store.chunk_size = 16
+
+    def test_round_trip(self):
+        """ Test that chunked options round trip through the backend """
+        obj = {"values": list(range(100)), "name": "flags"}
+        self.store.set("flags", dict(obj))
+
+        self.assertEqual(self.store.get("flags"), obj)
+        self.assertEqual(self.store.get(), {"flags": obj})
+
+    def test_floats_are_rejected(self):
+        """ Test that oversized options are rejected with floats like small ones """
+        with self.assertRaises(TypeError):
+            self.store.set("flags", {"values": [0.5] * 100})
+        with self.assertRaises(TypeError):
+            self.store.set("flags", {"value": 0.5})
+        self.assertEqual(self.store.get(), {})
+
+    def test_incomplete_chunks(self):
+        """ Test that missing chunks are detected """
+        self.backend.put({"_store": "test", "_option": "flags", "_chunks": 2, "_version": "v"})
+
+        with self.assertRaises(InconsistentItemException):
+            self.store.get("flags")
+
+
+@dataclasses.dataclass
+class Database(object):
+    host: str
+    port: int = 5432
+    ratio: typing.Optional[float] = None
+    enabled: bool = True
+    tags: list = dataclasses.field(default_factory=list)
+
+
+class TestSchema(unittest.TestCase):
+
+    def setUp(self):
+
+        # Configuration options
+        self.table_name = "test"
+        self.store_name = "test"
+
+        # Instanciate the store
+        self.store = DynamoDBMetaStore(
+            connection=connection,
+            session=session,
+            table_name=self.table_name,
+            store_name=self.store_name,
+            create_table=True,
+            schemas={"db": Database}
+        )
+
+        # Get an Table instance for validation
+        self.table = self.store.table
+
+    def test_dataclass(self):
+        """ Test that options with a dataclass schema round trip """
+        db = Database(host="127.0.0.1", ratio=0.25, tags=["a", {"b": decimal.Decimal("1.5")}])
+        self.store.set("db", db)
+
+        item = self.table.get_item(Key={"_store": self.store_name, "_option": "db"})["Item"]
+        self.assertEqual(item["port"], 5432)
+        self.assertEqual(item["enabled"], True)
+
+        option = self.store.get("db")
+        self.assertIsInstance(option, Database)
+        self.assertEqual(option, db)
+        self.assertEqual(self.store.get("db", keys=["host", "port"]), {"host": "127.0.0.1", "port": 5432})
+        self.assertEqual(self.store.get_options(["db"]), {"db": db})
+        self.assertEqual(self.store.get(), {"db": db})
+
+    def test_dict_schema(self):
+        """ Test that options with a field map schema use a generated class """
+        Api = self.store.register_schema("api", {"endpoint": str, "port": int, "token": bytes})
+        self.store.set("api", {"endpoint": "http://test.com", "port": 80, "token": b"secret"})
+
+        option = self.store.get("api")
+        self.assertIsInstance(option, Api)
+        self.assertEqual(option, Api(endpoint="http://test.com", port=80, token=b"secret"))
+        self.assertFalse(hasattr(option, "__dict__"))
+
+    def test_missing_fields(self):
+        """ Test that missing fields use the defaults of the schema class """
+        self.table.put_item(Item={"_store": self.store_name, "_option": "db", "host": "localhost"})
+
+        self.assertEqual(self.store.get("db"), Database(host="localhost"))
+
+    def test_stored_type_mismatch(self):
+        """ Test that values stored with another type are converted """
+        self.table.put_item(Item={"_store": self.store_name, "_option": "db", "host": "localhost", "port": "80"})
+
+        self.assertEqual(self.store.get("db"), Database(host="localhost", port=80))
+        self.assertEqual(self.store.get_options(["db"]), {"db": Database(host="localhost", port=80)})
+
+        self.table.put_item(Item={"_store": self.store_name, "_option": "db", "host": 5})
+        self.assertEqual(self.store.get("db"), Database(host="5"))
+        self.assertEqual(self.store.get_options(["db"]), {"db": Database(host="5")})
+
+    def test_fractional_int(self):
+        """ Test that fractional numbers in int fields are rejected """
+        self.table.put_item(Item={
+            "_store": self.store_name, "_option": "db", "host": "localhost", "port": decimal.Decimal("1.5")
+        })
+
+        with self.assertRaises(ValueError):
+            self.store.get("db")
+        with self.assertRaises(ValueError):
+            self.store.get_options(["db"])
+
+    def test_invalid_numbers(self):
+        """ Test that bools in int fields and non-finite floats are rejected """
+        with self.assertRaises(TypeError):
+            self.store.set("db", Database(host="127.0.0.1", port=True))
+        with self.assertRaises(TypeError):
+            self.store.set("db", Database(host="127.0.0.1", ratio=float("nan")))
+        with self.assertRaises(TypeError):
+            self.store.set("db", Database(host="127.0.0.1", ratio=float("inf")))
+
+    def test_invalid_values(self):
+        """ Test that values of other types than str, bool and bytes fields are rejected """
+        Api = self.store.register_schema("api", {"endpoint": str, "token": bytes})
+        with self.assertRaises(TypeError):
+            self.store.set("db", Database(host=5))
+        with self.assertRaises(TypeError):
+            self.store.set("db", Database(host="127.0.0.1", enabled="yes"))
+        with self.assertRaises(TypeError):
+            self.store.set("api", Api(endpoint="http://test.com", token="secret"))
+
+    def test_chunked(self):
+        """ Test that oversized options with a schema are chunked """
+        self.store.max_item_size = 1024
+        self.store.chunk_size = 256
+        db = Database(host="127.0.0.1", tags=list(range(500)))
+        self.store.set("db", db)
+
+        self.assertEqual(self.store.get("db"), db)
+        self.store.set("db", Database(host="localhost"))
+        self.assertEqual(self.store.get("db"), Database(host="localhost"))
+        self.assertEqual(len(self.store.query({"key": "_store", "value": self.store_name})), 1)
+
+    def test_invalid_value(self):
+        """ Test that options with a schema must be objects of its class or dicts """
+        with self.assertRaises(TypeError):
+            self.store.set("db", ["127.0.0.1"])
+
+    def tearDown(self):
+        """ Tear down the test case """
+        self.table.delete()
+
+
+class TestSessionCredentials(unittest.TestCase):
+
+    def setUp(self):
+
+        # Only the session has credentials
+        self.environ = mock.patch.dict(os.environ, {
+            "AWS_SHARED_CREDENTIALS_FILE": os.devnull,
+            "AWS_CONFIG_FILE": os.devnull,
+        })
+        self.environ.start()
+        for name in ["AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_SESSION_TOKEN", "AWS_PROFILE"]:
+            os.environ.pop(name, None)
+        self.session = boto3.session.Session(
+            aws_access_key_id="session",
+            aws_secret_access_key="session",
+            region_name=connection.meta.client.meta.region_name
+        )
+        self.connection = self.session.resource("dynamodb", endpoint_url="http://localhost:8000")
+
+        # Instanciate the store
+        self.store = DynamoDBMetaStore(
+            connection=self.connection,
+            session=self.session,
+            table_name="test",
+            store_name="test",
+            create_table=True,
+            schemas={"db": Database}
+        )
+        self.table = self.store.table
+
+    def test_wire_client_credentials(self):
+        """ Test that options with a schema use the credentials of the session """
+        signatures = []
+        self.store.backend.client.meta.events.register(
+            "before-send.dynamodb.*",
+            lambda request, **kwargs: signatures.append(request.headers["Authorization"])
+        )
+        db = Database(host="127.0.0.1")
+        self.store.set("db", db)
+
+        self.assertEqual(self.store.get("db"), db)
+        self.assertEqual(len(signatures), 2)
+        for signature in signatures:
+            self.assertIn(b"Credential=session/", signature)
+
+    def test_close_client(self):
+        """ Test that the client created by the store is closed with it """
+        client = self.store.client
+        with mock.patch.object(client._endpoint.http_session, "close") as close:
+            self.store.__del__()
+        close.assert_called_once_with()
+
+        store = DynamoDBMetaStore(connection=self.connection, client=client, table_name="test", store_name="test")
+        with mock.patch.object(client._endpoint.http_session, "close") as close:
+            store.__del__()
+        close.assert_not_called()
+
+    def test_connection_only(self):
+        """ Test that options with a schema go through the connection without session """
+        store = DynamoDBMetaStore(
+            connection=self.connection,
+            table_name="test",
+            store_name="test",
+            schemas={"db": Database}
+        )
+        self.assertFalse(store.backend.supports_wire)
+
+        db = Database(host="127.0.0.1", ratio=0.25)
+        store.set("db", db)
+        self.assertEqual(store.get("db"), db)
+
+    def tearDown(self):
+        """ Tear down the test case """
+        self.table.delete()
+        self.environ.stop()
+
+
+class TestDefaultSession(unittest.TestCase):
+
+    def setUp(self):
+
+        # Restore the boto3 default session after the test
+        self.patches = [
+            mock.patch.object(boto3, "DEFAULT_SESSION", None),
+            mock.patch.dict(os.environ, {"AWS_ENDPOINT_URL_DYNAMODB": "http://localhost:8000"}),
+        ]
+        for patch in self.patches:
+            patch.start()
+        boto3.setup_default_session(region_name="eu-west-3")
+
+        # Instanciate the store
+        self.store = DynamoDBMetaStore(table_name="test", store_name="test", create_table=True)
+        self.table = self.store.table
+
+    def test_default_session(self):
+        """ Test that the connection and the client use the boto3 default session """
+        self.assertEqual(self.store.connection.meta.client.meta.region_name, "eu-west-3")
+        self.assertEqual(self.store.client.meta.region_name, "eu-west-3")
+
+    def tearDown(self):
+        """ Tear down the test case """
+        self.table.delete()
+        for patch in reversed(self.patches):
+            patch.stop()
+
+
+class TestSchemaInMemory(unittest.TestCase):
+
+    def setUp(self):
+
+        # Instanciate the store
+        self.store = DynamoDBMetaStore(
+            table_name="test",
+            store_name="test",
+            backend=InMemoryBackend(),
+            schemas={"db": Database, "api": {"endpoint": str, "port": int}}
+        )
+
+    def test_round_trip(self):
+        """ Test that options with a schema round trip through the backend """
+        db = Database(host="127.0.0.1", ratio=0.25, tags=["a", 1])
+        self.store.set("db", db)
+        self.store.set("api", {"endpoint": "http://test.com"})
+        self.store.set("user", {"username": "luke"})
+
+        self.assertEqual(self.store.get("db"), db)
+        options = self.store.get()
+        self.assertEqual(options["db"], db)
+        self.assertEqual(options["api"].endpoint, "http://test.com")
+        self.assertIsNone(options["api"].port)
+        self.assertEqual(options["user"], {"username": "luke"})
+
+    def test_cache(self):
+        """ Test that options with a schema are cached as objects """
+        self.store.start_refresh(3600)
+        self.store.set("db", Database(host="127.0.0.1"))
+        option = self.store.get("db")
+        option.port = 1
+
+        self.assertEqual(self.store.get("db"), Database(host="127.0.0.1"))
+        self.store.stop_refresh()
+
+    def test_invalid_numbers(self):
+        """ Test that bools in int fields and non-finite floats are rejected """
+        with self.assertRaises(TypeError):
+            self.store.set("api", {"endpoint": "http://test.com", "port": False})
+        with self.assertRaises(TypeError):
+            self.store.set("db", Database(host="127.0.0.1", ratio=float("-inf")))
+        with self.assertRaises(TypeError):
+            self.store.set("api", {"endpoint": 5})
+
+    def test_fractional_int(self):
+        """ Test that fractional numbers in int fields are not truncated """
+        self.store.backend.put({"_store": "test", "_option": "api", "port": decimal.Decimal("1.5")})
+
+        with self.assertRaises(ValueError):
+            self.store.get("api")
+
+    def test_invalid_field(self):
+        """ Test that field names must be identifiers """
+        with self.assertRaises(ValueError):
+            self.store.register_schema("bad", {"not valid": str})
+
+
 class TestMisconfiguredSchemaException(unittest.TestCase):
 
     def setUp(self):